@@ -0,0 +1,82 @@
+#!python3
+
+"""Measure CLI startup cost.
+
+Runs each command in a fresh interpreter with `-X importtime`, and reports
+wall time, cumulative import time and whether any heavy dependency was loaded.
+
+    poetry run python benchmarks/import_time.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HEAVY_MODULES = ["openstack", "sushy", "urllib3"]
+
+EMPTY_DIR = tempfile.mkdtemp()
+FIRMWARE_INDEX = Path(EMPTY_DIR, "firmware-index.json")
+FIRMWARE_INDEX.write_text('{"nodes": {}, "components": {}}')
+STORAGE_INDEX = Path(EMPTY_DIR, "storage-index.json")
+STORAGE_INDEX.write_text('{"nodes": {}}')
+INVENTORY_DB = str(Path(EMPTY_DIR, "inventory.sqlite"))
+
+COMMANDS = {
+    "help": ["--help"],
+    "scan --help": ["scan", "--help"],
+    "diff": ["diff", EMPTY_DIR, EMPTY_DIR],
+    "profiles": ["profiles", EMPTY_DIR],
+    "firmware": ["firmware", str(FIRMWARE_INDEX), "--component", "NIC"],
+    "storage": ["storage", str(STORAGE_INDEX), "--unhealthy"],
+    # index runs first and creates the database that query reads
+    "index": ["index", EMPTY_DIR, "--db", INVENTORY_DB],
+    "query": ["query", "--db", INVENTORY_DB, "--rack", "r1"],
+}
+
+REPEAT = 5
+
+
+def measure(cli_args):
+    cmd = [sys.executable, "-X", "importtime", "-m", "redfish_inspector.main"]
+    cmd += cli_args
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(Path(__file__).resolve().parents[1])
+
+    best_wall = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+
+    # lines look like "import time:    self [us] | cumulative | imported package"
+    # nested imports are indented, only top level entries add up to the total
+    imported = set()
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+        imported.add(name.strip())
+
+    heavy = [m for m in HEAVY_MODULES if m in imported]
+    return best_wall, total_us, heavy
+
+
+def main():
+    for label, cli_args in COMMANDS.items():
+        wall, total_us, heavy = measure(cli_args)
+        print(
+            f"{label:<12} wall {wall * 1e3:7.1f} ms  "
+            f"imports {total_us / 1e3:7.1f} ms  "
+            f"heavy: {', '.join(heavy) or 'none'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
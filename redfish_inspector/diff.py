@@ -0,0 +1,65 @@
+#!python3
+
+"""Compare node files from two scans without contacting any BMC."""
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Tuple
+
+from redfish_inspector.nodefiles import load_node_files
+
+MISSING = "<missing>"
+
+
+def diff_values(old: Any, new: Any, prefix: str = "") -> List[Tuple[str, Any, Any]]:
+    """Return (dotted key, old, new) for every leaf that differs."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in sorted(set(old) | set(new), key=str):
+            child = f"{prefix}.{key}" if prefix else str(key)
+            changes.extend(
+                diff_values(old.get(key, MISSING), new.get(key, MISSING), child)
+            )
+        return changes
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for idx, (old_item, new_item) in enumerate(zip(old, new)):
+            changes.extend(diff_values(old_item, new_item, f"{prefix}[{idx}]"))
+        return changes
+    if old != new:
+        return [(prefix, old, new)]
+    return []
+
+
+def diff_nodes(
+    old_nodes: Mapping[str, Mapping], new_nodes: Mapping[str, Mapping]
+) -> Dict[str, List[Tuple[str, Any, Any]]]:
+    """Diff two sets of node documents keyed by uid."""
+    result = {}
+    for uid in sorted(set(old_nodes) | set(new_nodes)):
+        changes = diff_values(old_nodes.get(uid, MISSING), new_nodes.get(uid, MISSING))
+        if changes:
+            result[uid] = changes
+    return result
+
+
+def run(args: argparse.Namespace) -> int:
+    old_nodes = load_node_files(Path(args.old))
+    new_nodes = load_node_files(Path(args.new))
+
+    if Path(args.old).is_file() and Path(args.new).is_file():
+        # comparing two single files, match them even if the uid changed
+        old_nodes = dict(zip(["node"], old_nodes.values()))
+        new_nodes = dict(zip(["node"], new_nodes.values()))
+
+    result = diff_nodes(old_nodes, new_nodes)
+    for uid, changes in result.items():
+        name = (new_nodes.get(uid) or old_nodes.get(uid) or {}).get("node_name", uid)
+        print(f"{name} ({uid})")
+        for key, old, new in changes:
+            if not key:
+                print("  only in new" if old == MISSING else "  only in old")
+            else:
+                print(f"  {key}: {old} -> {new}")
+
+    return 1 if result else 0
@@ -0,0 +1,138 @@
+#!python3
+
+"""Fleet-wide firmware index.
+
+`scan --firmware-index` records the firmware inventory of every scanned node
+in a json index. The `firmware` command answers version queries from that
+index without contacting any BMC.
+"""
+
+import argparse
+import collections
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# first match wins, tested against the inventory Id, Name and device class.
+# Disk comes before RAID since Dell drive names include their controller, e.g.
+# "Disk 0 in Backplane 1 of Integrated RAID Controller 1".
+COMPONENT_PATTERNS = [
+    ("BMC", re.compile(r"iDRAC|\bBMC\b|Remote Access Controller", re.I)),
+    ("BIOS", re.compile(r"\bBIOS\b", re.I)),
+    ("Disk", re.compile(r"\bDisk\b|\bDrive\b|\bSSD\b|NVMe", re.I)),
+    ("RAID", re.compile(r"RAID|PERC|\bHBA\b|BOSS|MassStorage", re.I)),
+    ("NIC", re.compile(r"\bNIC\b|Ethernet|ConnectX|InfiniBand|Network", re.I)),
+    (
+        "GPU",
+        re.compile(r"\bGPU\b|DisplayController|NVIDIA|Tesla|Instinct", re.I),
+    ),
+    ("CPLD", re.compile(r"CPLD", re.I)),
+    ("PSU", re.compile(r"Power Supply|\bPSU\b", re.I)),
+]
+
+
+def component_for(*descriptions: Optional[str]) -> str:
+    text = " ".join(d for d in descriptions if d)
+    for component, pattern in COMPONENT_PATTERNS:
+        if pattern.search(text):
+            return component
+    return "Other"
+
+
+def version_key(version: Optional[str]) -> Tuple[int, ...]:
+    """Sort key for vendor version strings such as 2.13.3 or 4.40.00.00."""
+    return tuple(int(part) for part in re.findall(r"\d+", version or ""))
+
+
+def load_index(index_path: Path) -> Dict:
+    """Load the index, or start an empty one if it does not exist yet."""
+    if Path(index_path).exists():
+        with open(index_path) as f:
+            return json.load(f)
+    return {"nodes": {}, "components": {}}
+
+
+def build_components(nodes: Mapping[str, Mapping]) -> Dict:
+    """Map component -> version -> sorted list of node uids."""
+    components = collections.defaultdict(lambda: collections.defaultdict(set))
+    for uid, node in nodes.items():
+        for fw in node.get("firmware", []):
+            components[fw["component"]][fw["version"]].add(uid)
+
+    return {
+        component: {version: sorted(uids) for version, uids in versions.items()}
+        for component, versions in components.items()
+    }
+
+
+def update_index(index_path: Path, reference_nodes: Iterable) -> Dict:
+    """Add or replace the scanned nodes in the index at `index_path`."""
+    index = load_index(index_path)
+    for reference_node in reference_nodes:
+        index["nodes"][reference_node.uid] = {
+            "node_name": reference_node.node_name,
+            "firmware": reference_node.firmware,
+        }
+    index["components"] = build_components(index["nodes"])
+
+    with open(index_path, "w+") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        print(f"generated {index_path}")
+    return index
+
+
+def query_index(
+    index: Mapping,
+    component: Optional[str] = None,
+    below: Optional[str] = None,
+    version: Optional[str] = None,
+    name: Optional[str] = None,
+) -> List[Tuple[str, str, str]]:
+    """Return sorted (component, version, uid) rows matching the filters.
+
+    `name` is a case insensitive substring of the inventory name, useful to
+    compare versions of one NIC or RAID model only.
+    """
+    rows = []
+    for comp, versions in index["components"].items():
+        if component and comp.lower() != component.lower():
+            continue
+        for ver, uids in versions.items():
+            if version is not None and ver != version:
+                continue
+            if below is not None and not version_key(ver) < version_key(below):
+                continue
+            if name is not None:
+                uids = [
+                    uid
+                    for uid in uids
+                    if any(
+                        fw["component"] == comp
+                        and fw["version"] == ver
+                        and name.lower() in (fw.get("name") or "").lower()
+                        for fw in index["nodes"][uid]["firmware"]
+                    )
+                ]
+            rows.extend((comp, ver, uid) for uid in uids)
+
+    return sorted(rows, key=lambda row: (row[0], version_key(row[1]), row[2]))
+
+
+def run(args: argparse.Namespace) -> int:
+    # an empty result must mean "no match", not "no index"
+    if not Path(args.index).is_file():
+        raise SystemExit(f"no firmware index at {args.index}")
+    index = load_index(args.index)
+    rows = query_index(
+        index,
+        component=args.component,
+        below=args.below,
+        version=args.version,
+        name=args.name,
+    )
+    for component, version, uid in rows:
+        node_name = index["nodes"].get(uid, {}).get("node_name")
+        print(f"{component:<6} {version:<20} {node_name} ({uid})")
+
+    return 0
@@ -1,44 +1,73 @@
 #!python3
 
+"""Command line entry point.
+
+Subcommands import their implementation lazily, so `--help` and the offline
+commands never pay for loading openstacksdk, sushy or urllib3.
+"""
 
 import argparse
-import concurrent.futures
-import json
-import logging
-import re
+import sys
 from pathlib import Path
-from typing import List, Mapping
-
-import openstack
-import sushy
-import urllib3
-from openstack import connection
-from openstack.baremetal.v1.node import Node
-from openstack.baremetal.v1.port import Port
-from sushy.exceptions import AccessError, ConnectionError
-from sushy.resources.system import constants as sys_consts
-from sushy.resources.system.processor import Processor
-from sushy.resources.system.storage.drive import Drive
-
-from redfish_inspector import referenceapi
-from redfish_inspector.redfish import (
-    NetworkAdapter,
-    NetworkPort,
-    network_adapters,
-    pcie_devices,
-)
-
-# Initialize and turn on debug logging
-openstack.enable_logging(debug=False)
-logging.captureWarnings(True)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-CHASSIS_PATH = "/redfish/v1/Chassis/System.Embedded.1"
 
 
-def run():
+def cmd_scan(args: argparse.Namespace):
+    from redfish_inspector import scan
+
+    return scan.run(args)
+
+
+def cmd_diff(args: argparse.Namespace):
+    from redfish_inspector import diff
+
+    return diff.run(args)
+
+
+def cmd_profiles(args: argparse.Namespace):
+    from redfish_inspector import profiles
+
+    return profiles.run(args)
+
+
+def cmd_firmware(args: argparse.Namespace):
+    from redfish_inspector import firmware
+
+    return firmware.run(args)
+
+
+def cmd_storage(args: argparse.Namespace):
+    from redfish_inspector import storage
+
+    return storage.run(args)
+
+
+def cmd_index(args: argparse.Namespace):
+    from redfish_inspector import store
+
+    return store.run_index(args)
+
+
+def cmd_query(args: argparse.Namespace):
+    from redfish_inspector import store
+
+    return store.run_query(args)
+
+
+def cmd_serve(args: argparse.Namespace):
+    from redfish_inspector import store
+
+    return store.run_serve(args)
+
+
+def get_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Scrape Redfish Info.")
-    parser.add_argument(
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+
+    scan_parser = subparsers.add_parser(
+        "scan", help="query BMCs over redfish and write node files"
+    )
+    scan_parser.add_argument(
         "--name",
         dest="node_names",
         default=[],
@@ -46,149 +75,168 @@ def run():
         action="append",
         help="ironic node name to scrape",
     )
-
-    parser.add_argument(
+    scan_parser.add_argument(
         "--all",
         action="store_true",
         help="scan all registered nodes",
     )
-
-    parser.add_argument(
+    scan_parser.add_argument(
         "--output-path",
         type=Path,
         default=".",
         help="path to reference-repository subdir for your cluster",
     )
+    scan_parser.add_argument(
+        "--cloud",
+        dest="clouds",
+        default=[],
+        type=str,
+        action="append",
+        help="clouds.yaml entry to scan, may be repeated to scan several sites "
+        "concurrently into per-cloud subdirs of --output-path (default: OS_CLOUD)",
+    )
+    scan_parser.add_argument(
+        "--workers",
+        type=int,
+        default=20,
+        help="maximum number of nodes scanned at once, shared by all clouds",
+    )
+    scan_parser.add_argument(
+        "--bmc-requests",
+        type=int,
+        default=4,
+        help="maximum concurrent requests to a single BMC when fetching storage; "
+        "at most workers x bmc-requests requests are in flight overall",
+    )
+    scan_parser.add_argument(
+        "--firmware-index",
+        type=Path,
+        default=None,
+        help="collect firmware inventory and merge it into this json index",
+    )
+    scan_parser.add_argument(
+        "--storage-index",
+        type=Path,
+        default=None,
+        help="merge storage topology and health into this json index",
+    )
+    scan_parser.add_argument(
+        "--db",
+        type=Path,
+        default=None,
+        help="also store scanned nodes in this inventory database",
+    )
+    scan_parser.set_defaults(func=cmd_scan)
+
+    diff_parser = subparsers.add_parser(
+        "diff", help="compare node files from two scans (offline)"
+    )
+    diff_parser.add_argument("old", type=Path, help="node file or directory")
+    diff_parser.add_argument("new", type=Path, help="node file or directory")
+    diff_parser.set_defaults(func=cmd_diff)
+
+    profiles_parser = subparsers.add_parser(
+        "profiles", help="group node files into shared hardware profiles (offline)"
+    )
+    profiles_parser.add_argument(
+        "input_path", type=Path, help="directory of node files from a scan"
+    )
+    profiles_parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="write the profile table and per-node deltas to this json file",
+    )
+    profiles_parser.set_defaults(func=cmd_profiles)
+
+    firmware_parser = subparsers.add_parser(
+        "firmware", help="query the firmware index written by scan (offline)"
+    )
+    firmware_parser.add_argument(
+        "index", type=Path, help="index written by scan --firmware-index"
+    )
+    firmware_parser.add_argument(
+        "--component", help="BIOS, BMC, NIC, RAID, Disk, GPU, CPLD, PSU or Other"
+    )
+    firmware_parser.add_argument(
+        "--name", help="only firmware whose inventory name contains this"
+    )
+    firmware_parser.add_argument(
+        "--below", metavar="VERSION", help="only versions older than this"
+    )
+    firmware_parser.add_argument("--version", help="only this exact version")
+    firmware_parser.set_defaults(func=cmd_firmware)
+
+    storage_parser = subparsers.add_parser(
+        "storage", help="query the storage index written by scan (offline)"
+    )
+    storage_parser.add_argument(
+        "index", type=Path, help="index written by scan --storage-index"
+    )
+    storage_parser.add_argument(
+        "--unhealthy",
+        action="store_true",
+        help="only drives and controllers whose health is not OK",
+    )
+    storage_parser.add_argument(
+        "--media-life-below",
+        type=int,
+        metavar="PERCENT",
+        help="only drives with less predicted media life left than this",
+    )
+    storage_parser.set_defaults(func=cmd_storage)
+
+    index_parser = subparsers.add_parser(
+        "index", help="load node files into the inventory database (offline)"
+    )
+    index_parser.add_argument(
+        "input_paths", type=Path, nargs="+", help="node files or directories"
+    )
+    index_parser.add_argument(
+        "--db", type=Path, required=True, help="inventory database"
+    )
+    index_parser.set_defaults(func=cmd_index)
 
-    args = parser.parse_args()
-
-    node_query = {
-        "fields": [
-            "name",
-            "id",
-            "driver_info",
-            "properties",
-        ],
-    }
-
-    conn: connection.Connection
-    with openstack.connect() as conn:
-        # List baremetal servers
-        nodes: List[Node]
-        nodes = conn.baremetal.nodes(**node_query)
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-            future_to_result = {
-                executor.submit(get_node_info, node, args): node
-                for node in nodes
-                if (node.name.lower() in args.node_names) or args.all
-            }
-            for future in concurrent.futures.as_completed(future_to_result):
-                try:
-                    data = future.result()
-                except AccessError or ConnectionError as exc:
-                    print(exc)
-
-
-def get_node_info(node: Node, args: argparse.Namespace):
-
-    # print(node.name, node.id, node.properties)
-    bmc_addr = node.driver_info.get("ipmi_address")
-    bmc_username = node.driver_info.get("ipmi_username")
-    bmc_password = node.driver_info.get("ipmi_password")
-
-    base_url = f"https://{bmc_addr}/redfish/v1"
-
-    reference_node = referenceapi.ChameleonBaremetal(node=node)
-
-    try:
-        conn = sushy.Sushy(
-            base_url=base_url,
-            username=bmc_username,
-            password=bmc_password,
-            verify=False,
-        )
-    except ConnectionError:
-        print(f"failed to connect to {node.name} at {bmc_addr}")
-        raise
-    except AccessError:
-        print(f"failed to access {node.name} at {bmc_addr}")
-        raise
-
-    print(f"querying {node.name} at {bmc_addr}")
-    system = conn.get_system()
-
-    if system.redfish_version and system.redfish_version <= "1.0.2":
-        logging.warn(f"Node {node.name} does not have a supported redfish version")
-        return None
-
-    reference_node.set_arch(system)
-    reference_node.set_bios(system)
-    reference_node.set_memory(system)
-    reference_node.set_monitoring()
-
-    processors: List[Processor] = [
-        proc
-        for proc in system.processors.get_members()
-        if proc.processor_type == sys_consts.PROCESSOR_TYPE_CPU
-    ]
-    cpu = processors[0]
-    reference_node.set_processor(cpu)
-
-    chassis = conn.get_chassis(CHASSIS_PATH)
-    reference_node.set_chassis(chassis)
-
-    ironic_mac = []
-    port_query = {"node_id": node.id, "fields": ["address"]}
-    # reuse connection
-    os_connection = node._connection
-    for os_port in os_connection.baremetal.ports(**port_query):
-        ironic_mac.append(os_port.address)
-
-    adapters = network_adapters(chassis)
-    for adapter in adapters.get_members():
-        port: NetworkPort
-        for port in adapter.ports().get_members():
-            enabled = False
-            for mac in port.mac_address:
-                if str.lower(mac) in ironic_mac:
-                    enabled = True
-                    break
-            # print(port.mac_address, ironic_mac)
-            reference_node.add_network_port(adapter, port, enabled)
-
-    for pcie_dev in pcie_devices(system=system):
-        reference_node.add_pcie_dev(pcie_dev)
-
-    reference_node.get_gpus()
-    reference_node.get_fgpas()
-
-    reference_node.set_location(chassis)
-
-    for controller in system.storage.get_members():
-        drive: Drive
-        for drive in controller.drives:
-            reference_node.add_storage(drive)
-
-    reference_node.check_infiniband()
-
-    reference_node.check_node_type()
-    reference_filename = f"{node.id}.json"
-    referencerepo_path = Path(
-        args.output_path
-        # "../reference-repository/data/chameleoncloud/sites/uc/clusters/chameleon/nodes"
-    )
-
-    output_dict: Mapping = reference_node.json()
-    # remove entries not in current referenceapi
-    output_dict.pop("pcie_devices")
-    if not output_dict.get("gpu"):
-        output_dict.pop("gpu")
-
-    output_file = Path(referencerepo_path, reference_filename)
-    with open(output_file, "w+") as f:
-        json.dump(output_dict, f, indent=2, sort_keys=True)
-        print(f"generated {output_file}")
+    query_parser = subparsers.add_parser(
+        "query", help="find nodes in the inventory database (offline)"
+    )
+    query_parser.add_argument(
+        "--db", type=Path, required=True, help="inventory database"
+    )
+    query_parser.add_argument("--name", help="node name")
+    query_parser.add_argument("--node-type", help="node type, e.g. compute_skylake")
+    query_parser.add_argument("--gpu-model", help="full gpu model name")
+    query_parser.add_argument("--gpu-name", help="short gpu name, e.g. MI100")
+    query_parser.add_argument("--rack", help="rack name")
+    query_parser.add_argument("--serial", help="chassis serial")
+    query_parser.add_argument("--mac", help="mac address of any port")
+    query_parser.add_argument(
+        "--infiniband",
+        action="store_true",
+        default=None,
+        help="only nodes with an infiniband port",
+    )
+    query_parser.add_argument(
+        "--json", action="store_true", help="print full node documents"
+    )
+    query_parser.set_defaults(func=cmd_query)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve the inventory database as a read only http api"
+    )
+    serve_parser.add_argument(
+        "--db", type=Path, required=True, help="inventory database"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def run():
+    args = get_parser().parse_args()
+    sys.exit(args.func(args))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+#!python3
+
+"""Read referenceapi node files written by a previous scan.
+
+Only the standard library is imported here, so offline commands can use this
+module without pulling in openstacksdk or sushy.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Mapping
+
+
+def is_node_doc(doc) -> bool:
+    """Check that a loaded json document looks like a referenceapi node."""
+    return isinstance(doc, dict) and doc.get("type") == "node" and "uid" in doc
+
+
+def load_node_file(path: Path) -> Mapping:
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_node_files(path: Path) -> Dict[str, Mapping]:
+    """Load one node file, or every node file in a directory, keyed by uid.
+
+    Json files in the directory that are not node documents are skipped.
+    """
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(path.glob("*.json"))
+    else:
+        files = [path]
+
+    nodes = {}
+    for node_file in files:
+        doc = load_node_file(node_file)
+        if is_node_doc(doc):
+            nodes[doc["uid"]] = doc
+    return nodes
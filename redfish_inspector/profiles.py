@@ -0,0 +1,120 @@
+#!python3
+
+"""Group scanned nodes into shared hardware profiles.
+
+Nodes of the same node_type are usually identical apart from serials, MACs
+and placement. Each node document is split into a hardware profile and a
+per-node delta; identical profiles are stored once, and nodes whose profile
+differs from the most common one in their node_type are reported as outliers.
+"""
+
+import argparse
+import collections
+import copy
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from redfish_inspector.diff import diff_values
+from redfish_inspector.nodefiles import load_node_files
+
+# Values that identify a single node rather than its hardware. `None` moves the
+# whole top level key to the delta, a list moves only those keys of a dict
+# section, or of each entry of a list section.
+NODE_SPECIFIC = {
+    "uid": None,
+    "node_name": None,
+    "placement": None,
+    "chassis": ["serial"],
+    "network_adapters": ["mac", "enabled"],
+}
+
+
+def split_node(node: Mapping) -> Tuple[Dict, Dict]:
+    """Split a node document into (hardware profile, per-node delta)."""
+    profile = copy.deepcopy(dict(node))
+    delta = {}
+
+    for section, keys in NODE_SPECIFIC.items():
+        if section not in profile:
+            continue
+        if keys is None:
+            delta[section] = profile.pop(section)
+        elif isinstance(profile[section], dict):
+            delta[section] = {k: profile[section].pop(k, None) for k in keys}
+        elif isinstance(profile[section], list):
+            delta[section] = [
+                {k: entry.pop(k, None) for k in keys} for entry in profile[section]
+            ]
+
+    return profile, delta
+
+
+def profile_hash(profile: Mapping) -> str:
+    encoded = json.dumps(profile, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+def cluster_nodes(nodes: Mapping[str, Mapping]) -> Dict:
+    """Build the profile table, per-node deltas and outliers for a fleet."""
+    profiles = {}
+    node_entries = {}
+    by_type: Dict[Optional[str], List[str]] = collections.defaultdict(list)
+
+    for uid, node in sorted(nodes.items()):
+        profile, delta = split_node(node)
+        digest = profile_hash(profile)
+        entry = profiles.setdefault(
+            digest,
+            {"node_type": profile.get("node_type"), "count": 0, "hardware": profile},
+        )
+        entry["count"] += 1
+        node_entries[uid] = {"profile": digest, **delta}
+        by_type[profile.get("node_type")].append(uid)
+
+    node_types = {}
+    for node_type, uids in by_type.items():
+        counts = collections.Counter(node_entries[uid]["profile"] for uid in uids)
+        # most common profile wins, ties broken by hash to keep output stable
+        reference = min(counts, key=lambda digest: (-counts[digest], digest))
+        node_types[str(node_type)] = {
+            "profile": reference,
+            "nodes": len(uids),
+            "outliers": [
+                uid for uid in uids if node_entries[uid]["profile"] != reference
+            ],
+        }
+
+    return {"profiles": profiles, "node_types": node_types, "nodes": node_entries}
+
+
+def run(args: argparse.Namespace) -> int:
+    nodes = load_node_files(Path(args.input_path))
+    result = cluster_nodes(nodes)
+    profiles = result["profiles"]
+
+    for node_type, group in sorted(result["node_types"].items()):
+        reference = group["profile"]
+        group_profiles = {
+            result["nodes"][uid]["profile"] for uid in group["outliers"]
+        } | {reference}
+        print(
+            f"{node_type}: {group['nodes']} nodes, {len(group_profiles)} profiles, "
+            f"{len(group['outliers'])} outliers"
+        )
+        for uid in group["outliers"]:
+            digest = result["nodes"][uid]["profile"]
+            print(f"  outlier {result['nodes'][uid].get('node_name')} ({uid})")
+            changes = diff_values(
+                profiles[reference]["hardware"], profiles[digest]["hardware"]
+            )
+            for key, expected, found in changes:
+                print(f"    {key}: expected {expected}, found {found}")
+
+    if args.output:
+        with open(args.output, "w+") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+            print(f"generated {args.output}")
+
+    return 0
@@ -1,7 +1,11 @@
 #!python3
 
 
-from sushy import utils
+import concurrent.futures
+import logging
+from typing import List, Mapping
+
+from sushy import Sushy, exceptions, utils
 from sushy.resources import base, chassis, common, constants
 from sushy.resources.chassis.chassis import Chassis
 from sushy.resources.system.system import System
@@ -171,3 +175,94 @@ class NetworkAdapterCollection(base.ResourceCollectionBase):
                 if eth.status.health == constants.HEALTH_OK:
                     mac_dict[eth.mac_address] = eth.status.state
         return mac_dict
+
+
+def firmware_inventory(root: Sushy) -> List[Mapping]:
+    """Raw json of every member of `UpdateService/FirmwareInventory`
+
+    When the service root advertises `$expand` support, all members are
+    fetched in a single request. Members the BMC did not expand, or all of
+    them if `$expand` is unsupported, are fetched one by one.
+    """
+    update_service = root.get_update_service()
+    path = utils.get_sub_resource_path_by(update_service, "FirmwareInventory")
+
+    expand = root.json.get("ProtocolFeaturesSupported", {}).get("ExpandQuery", {})
+    if expand.get("NoLinks") or expand.get("ExpandAll"):
+        levels = "($levels=1)" if expand.get("Levels") else ""
+        query = "." if expand.get("NoLinks") else "*"
+        collection = root._conn.get(path=f"{path}?$expand={query}{levels}").json()
+    else:
+        collection = root._conn.get(path=path).json()
+
+    members = []
+    for member in collection.get("Members", []):
+        if set(member) == {"@odata.id"}:
+            member = root._conn.get(path=member["@odata.id"]).json()
+        members.append(member)
+    return members
+
+
+def storage_inventory(system: System, max_workers: int = 4) -> List[Mapping]:
+    """Storage controllers with their drives and volumes
+
+    Controllers and their volume collections are fetched concurrently, then
+    every drive and volume of every controller is fetched concurrently, with
+    at most `max_workers` requests in flight to the BMC. A controller, drive
+    or volume that fails to load is logged and left out instead of failing
+    the whole node.
+
+    :returns: list of dictionaries in the format
+        {"controller": Storage, "drives": [Drive], "volumes": [Volume]}
+    """
+    collection = system.storage
+    inventory = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_path = {
+            executor.submit(_controller_with_volumes, collection, path): path
+            for path in collection.members_identities
+        }
+
+        future_to_member = {}
+        for future in concurrent.futures.as_completed(future_to_path):
+            try:
+                controller, volumes = future.result()
+            except exceptions.SushyError as exc:
+                logging.warn(f"failed to fetch {future_to_path[future]}: {exc}")
+                continue
+
+            entry = {"controller": controller, "drives": [], "volumes": []}
+            inventory.append(entry)
+
+            for path in controller.drives_identities:
+                future = executor.submit(controller.get_drive, path)
+                future_to_member[future] = (entry["drives"], path)
+            if volumes is None:
+                continue
+            for path in volumes.members_identities:
+                future = executor.submit(volumes.get_member, path)
+                future_to_member[future] = (entry["volumes"], path)
+
+        for future in concurrent.futures.as_completed(future_to_member):
+            members, path = future_to_member[future]
+            try:
+                members.append(future.result())
+            except exceptions.SushyError as exc:
+                logging.warn(f"failed to fetch {path}: {exc}")
+
+    # keep output stable regardless of completion order
+    inventory.sort(key=lambda entry: entry["controller"].identity)
+    for entry in inventory:
+        entry["drives"].sort(key=lambda drive: drive.identity)
+        entry["volumes"].sort(key=lambda volume: volume.identity)
+    return inventory
+
+
+def _controller_with_volumes(collection, path: str):
+    controller = collection.get_member(path)
+    try:
+        volumes = controller.volumes
+    except exceptions.SushyError as exc:
+        logging.warn(f"no volumes for {controller.identity}: {exc}")
+        volumes = None
+    return controller, volumes
@@ -1,20 +1,26 @@
 #!python3
 
+from __future__ import annotations
+
 import json
 import logging
-from typing import List, Mapping
-
-from openstack.baremetal.v1.node import Node
-from sushy import exceptions as s_exec
-from sushy import utils
-from sushy.resources.chassis.chassis import Chassis
-from sushy.resources.system import processor
-from sushy.resources.system.processor import Processor
-from sushy.resources.system.storage.drive import Drive
-from sushy.resources.system.system import System
+from typing import TYPE_CHECKING, List, Mapping, Optional
 
 from redfish_inspector import constants as reference_constants
-from redfish_inspector.redfish import NetworkAdapter, NetworkPort, PcieDevice
+from redfish_inspector.firmware import component_for
+
+# openstacksdk and sushy are only needed for type hints here; importing them
+# eagerly would slow down the offline commands that reuse this module.
+if TYPE_CHECKING:
+    from openstack.baremetal.v1.node import Node
+    from sushy.resources.chassis.chassis import Chassis
+    from sushy.resources.system.processor import Processor
+    from sushy.resources.system.storage.drive import Drive
+    from sushy.resources.system.storage.storage import Storage
+    from sushy.resources.system.storage.volume import Volume
+    from sushy.resources.system.system import System
+
+    from redfish_inspector.redfish import NetworkAdapter, NetworkPort, PcieDevice
 
 
 class ALVEO_U280(object):
@@ -65,6 +71,10 @@ class ChameleonBaremetal(G5kNode):
         self.network_adapters = []
         self.pcie_devices = []
         self.storage_devices = []
+        self.storage_controllers = []
+        # not part of the referenceapi schema, so kept out of the node files
+        # and written to the storage index instead
+        self.storage_health = []
         self.gpu = {}
 
     def from_dict(self, node_dict: Mapping):
@@ -178,24 +188,121 @@ class ChameleonBaremetal(G5kNode):
 
         self.network_adapters.append(port_dict)
 
-    def add_storage(self, drive: Drive):
-        size_in_gb = int(drive.capacity_bytes / (1e9))
-
+    def add_storage(self, drive: Drive, controller: Optional[Storage] = None):
         storage_dict = {
             "device": drive.identity,
             # "driver": "megaraid_sas",
-            "humanized_size": f"{size_in_gb} GB",
             "interface": drive.json.get("Protocol"),
             "model": drive.model,
             "rev": drive.json.get("Revision"),
-            "size": drive.capacity_bytes,
             "vendor": drive.manufacturer,
             "media_type": drive.media_type,
             # "serial_number": drive.serial_number,
             # "part_number": drive.part_number,
         }
+        # some drives report no capacity, leave the size out rather than guess
+        capacity = drive.capacity_bytes
+        if capacity:
+            storage_dict["humanized_size"] = f"{int(capacity / (1e9))} GB"
+            storage_dict["size"] = capacity
         self.storage_devices.append(storage_dict)
 
+        self.storage_health.append(
+            {
+                "type": "drive",
+                "device": drive.identity,
+                "controller": controller.identity if controller else None,
+                "health": drive.status.health if drive.status else None,
+                "predicted_media_life_left_percent": drive.json.get(
+                    "PredictedMediaLifeLeftPercent"
+                ),
+            }
+        )
+
+    def add_storage_controller(self, controller: Storage, volumes: List[Volume]):
+        """Record a storage controller and its RAID volumes."""
+        controller_models = [
+            c.get("Model") for c in controller.json.get("StorageControllers", [])
+        ]
+
+        volume_list = []
+        for volume in volumes:
+            drive_links = volume.json.get("Links", {}).get("Drives", [])
+            volume_list.append(
+                {
+                    "device": volume.identity,
+                    "name": volume.name,
+                    "raid_type": volume.json.get("RAIDType"),
+                    "volume_type": volume.json.get("VolumeType"),
+                    "size": volume.capacity_bytes,
+                    "drives": [
+                        link["@odata.id"].rstrip("/").split("/")[-1]
+                        for link in drive_links
+                    ],
+                }
+            )
+
+        self.storage_controllers.append(
+            {
+                "device": controller.identity,
+                "name": controller.name,
+                "model": next((m for m in controller_models if m), None),
+                "volumes": volume_list,
+            }
+        )
+        self.storage_health.append(
+            {
+                "type": "controller",
+                "device": controller.identity,
+                "health": controller.status.health if controller.status else None,
+            }
+        )
+
+    def set_firmware(self, members: List[Mapping]):
+        """Installed firmware from UpdateService/FirmwareInventory members."""
+        self.firmware = []
+        for member in members:
+            identity = member.get("Id", "")
+            # Dell also lists staged and rollback images
+            if identity.startswith(("Previous", "Available")):
+                continue
+            if not member.get("Version"):
+                continue
+            self.firmware.append(
+                {
+                    "component": component_for(identity, member.get("Name")),
+                    "id": identity,
+                    "name": member.get("Name"),
+                    "version": member.get("Version"),
+                }
+            )
+
+    def set_firmware_from_devices(self):
+        """Fallback when the BMC has no firmware inventory."""
+        self.firmware = []
+        if self.bios.get("version"):
+            self.firmware.append(
+                {
+                    "component": "BIOS",
+                    "id": "BIOS",
+                    "name": "BIOS",
+                    "version": self.bios.get("version"),
+                }
+            )
+        for dev in self.pcie_devices:
+            if not dev.get("firmware_version"):
+                continue
+            self.firmware.append(
+                {
+                    "component": component_for(
+                        dev.get("id"), dev.get("name"), dev.get("device_class")
+                    ),
+                    "id": dev.get("id"),
+                    "name": dev.get("name"),
+                    "version": dev.get("firmware_version"),
+                }
+            )
+
     def add_pcie_dev(self, dev: PcieDevice):
 
         # don't add dummy devices
@@ -0,0 +1,273 @@
+#!python3
+
+"""Scan ironic nodes over Redfish and write referenceapi node files."""
+
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import logging
+from pathlib import Path
+from typing import List, Mapping, Optional, Tuple
+
+import openstack
+import sushy
+import urllib3
+from openstack import connection
+from openstack.baremetal.v1.node import Node
+from sushy.exceptions import AccessError, ConnectionError, SushyError
+from sushy.resources import constants as res_cons
+from sushy.resources.system import constants as sys_consts
+from sushy.resources.system.processor import Processor
+from sushy.resources.system.storage.drive import Drive
+
+from redfish_inspector import firmware, referenceapi, storage, store
+from redfish_inspector.redfish import (
+    NetworkPort,
+    firmware_inventory,
+    network_adapters,
+    pcie_devices,
+    storage_inventory,
+)
+
+CHASSIS_PATH = "/redfish/v1/Chassis/System.Embedded.1"
+
+
+def run(args: argparse.Namespace) -> int:
+    # Initialize and turn on debug logging
+    openstack.enable_logging(debug=False)
+    logging.captureWarnings(True)
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # one node source and output subtree per cloud, scanned under a single
+    # worker pool so the concurrency budget is shared across sites
+    clouds: List[Optional[str]] = list(dict.fromkeys(args.clouds)) or [None]
+
+    with contextlib.ExitStack() as stack:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(clouds)
+        ) as list_executor, concurrent.futures.ThreadPoolExecutor(
+            max_workers=args.workers
+        ) as executor:
+            future_to_cloud = {
+                list_executor.submit(list_nodes, cloud, args): cloud for cloud in clouds
+            }
+
+            future_to_result = {}
+            failed_clouds = []
+            for list_future in concurrent.futures.as_completed(future_to_cloud):
+                cloud = future_to_cloud[list_future]
+                try:
+                    conn, nodes = list_future.result()
+                except Exception as exc:
+                    # a site being down should not stop the other sites
+                    logging.error(f"failed to list nodes of cloud {cloud}: {exc}")
+                    failed_clouds.append(cloud)
+                    continue
+                # keep the connection open for the port queries of each node
+                stack.enter_context(conn)
+
+                output_path = get_output_path(args.output_path, cloud, clouds)
+                for node in nodes:
+                    future = executor.submit(
+                        get_node_info,
+                        node,
+                        output_path,
+                        collect_firmware=bool(args.firmware_index),
+                        bmc_requests=args.bmc_requests,
+                    )
+                    future_to_result[future] = node
+
+            scanned: List[referenceapi.ChameleonBaremetal] = []
+            for future in concurrent.futures.as_completed(future_to_result):
+                node = future_to_result[future]
+                try:
+                    data = future.result()
+                except (AccessError, ConnectionError) as exc:
+                    print(exc)
+                except SushyError as exc:
+                    logging.error(f"failed to query {node.name}: {exc}")
+                except Exception:
+                    # one bad BMC should not discard the rest of the scan
+                    logging.exception(f"failed to process {node.name}")
+                else:
+                    if data:
+                        scanned.append(data)
+
+    if args.firmware_index:
+        firmware.update_index(args.firmware_index, scanned)
+
+    if args.storage_index:
+        storage.update_index(args.storage_index, scanned)
+
+    if args.db:
+        db = store.connect(args.db)
+        # same documents as the node files, so `index` and `scan --db` agree
+        count = store.add_nodes(db, [node_document(node) for node in scanned])
+        db.close()
+        print(f"stored {count} nodes in {args.db}")
+
+    # let cron jobs notice a site that was left out
+    if failed_clouds:
+        logging.error(f"clouds not scanned: {', '.join(map(str, failed_clouds))}")
+        return 1
+    return 0
+
+
+def list_nodes(
+    cloud: Optional[str], args: argparse.Namespace
+) -> Tuple[connection.Connection, List[Node]]:
+    node_query = {
+        "fields": [
+            "name",
+            "id",
+            "driver_info",
+            "properties",
+        ],
+    }
+
+    conn = openstack.connect(cloud=cloud)
+    try:
+        # List baremetal servers
+        nodes: List[Node] = [
+            node
+            for node in conn.baremetal.nodes(**node_query)
+            if (node.name.lower() in args.node_names) or args.all
+        ]
+    except Exception:
+        conn.close()
+        raise
+    return conn, nodes
+
+
+def get_output_path(output_path: Path, cloud: Optional[str], clouds: List) -> Path:
+    """Write into a per-cloud subdirectory when scanning more than one cloud."""
+    if len(clouds) > 1:
+        output_path = Path(output_path, cloud)
+        output_path.mkdir(parents=True, exist_ok=True)
+    return Path(output_path)
+
+
+def get_node_info(
+    node: Node,
+    output_path: Path,
+    collect_firmware: bool = False,
+    bmc_requests: int = 4,
+) -> Optional[referenceapi.ChameleonBaremetal]:
+
+    # print(node.name, node.id, node.properties)
+    bmc_addr = node.driver_info.get("ipmi_address")
+    bmc_username = node.driver_info.get("ipmi_username")
+    bmc_password = node.driver_info.get("ipmi_password")
+
+    base_url = f"https://{bmc_addr}/redfish/v1"
+
+    reference_node = referenceapi.ChameleonBaremetal(node=node)
+
+    try:
+        conn = sushy.Sushy(
+            base_url=base_url,
+            username=bmc_username,
+            password=bmc_password,
+            verify=False,
+        )
+    except ConnectionError:
+        print(f"failed to connect to {node.name} at {bmc_addr}")
+        raise
+    except AccessError:
+        print(f"failed to access {node.name} at {bmc_addr}")
+        raise
+
+    print(f"querying {node.name} at {bmc_addr}")
+    system = conn.get_system()
+
+    if system.redfish_version and system.redfish_version <= "1.0.2":
+        logging.warn(f"Node {node.name} does not have a supported redfish version")
+        return None
+
+    reference_node.set_arch(system)
+    reference_node.set_bios(system)
+    reference_node.set_memory(system)
+    reference_node.set_monitoring()
+
+    processors: List[Processor] = [
+        proc
+        for proc in system.processors.get_members()
+        if proc.processor_type == sys_consts.PROCESSOR_TYPE_CPU
+    ]
+    cpu = processors[0]
+    reference_node.set_processor(cpu)
+
+    chassis = conn.get_chassis(CHASSIS_PATH)
+    reference_node.set_chassis(chassis)
+
+    ironic_mac = []
+    port_query = {"node_id": node.id, "fields": ["address"]}
+    # reuse connection
+    os_connection = node._connection
+    for os_port in os_connection.baremetal.ports(**port_query):
+        ironic_mac.append(os_port.address)
+
+    adapters = network_adapters(chassis)
+    for adapter in adapters.get_members():
+        port: NetworkPort
+        for port in adapter.ports().get_members():
+            enabled = False
+            for mac in port.mac_address:
+                if str.lower(mac) in ironic_mac:
+                    enabled = True
+                    break
+            # print(port.mac_address, ironic_mac)
+            reference_node.add_network_port(adapter, port, enabled)
+
+    for pcie_dev in pcie_devices(system=system):
+        reference_node.add_pcie_dev(pcie_dev)
+
+    reference_node.get_gpus()
+    reference_node.get_fgpas()
+
+    reference_node.set_location(chassis)
+
+    if collect_firmware:
+        try:
+            reference_node.set_firmware(firmware_inventory(conn))
+        except SushyError as exc:
+            logging.warn(f"Node {node.name} has no firmware inventory: {exc}")
+            reference_node.set_firmware_from_devices()
+
+    for entry in storage_inventory(system, max_workers=bmc_requests):
+        controller = entry["controller"]
+        reference_node.add_storage_controller(controller, entry["volumes"])
+        drive: Drive
+        for drive in entry["drives"]:
+            reference_node.add_storage(drive, controller)
+
+    for status in reference_node.storage_health:
+        if status["health"] not in (None, res_cons.HEALTH_OK):
+            logging.warn(f"Node {node.name} {status['device']} is {status['health']}")
+
+    reference_node.check_infiniband()
+
+    reference_node.check_node_type()
+    reference_filename = f"{node.id}.json"
+
+    output_dict = node_document(reference_node)
+    output_file = Path(output_path, reference_filename)
+    with open(output_file, "w+") as f:
+        json.dump(output_dict, f, indent=2, sort_keys=True)
+        print(f"generated {output_file}")
+
+    return reference_node
+
+
+def node_document(reference_node: referenceapi.ChameleonBaremetal) -> Mapping:
+    """The node as written to its node file."""
+    output_dict: Mapping = dict(reference_node.json())
+    # remove entries not in current referenceapi
+    output_dict.pop("pcie_devices")
+    output_dict.pop("firmware", None)
+    output_dict.pop("storage_controllers")
+    output_dict.pop("storage_health")
+    if not output_dict.get("gpu"):
+        output_dict.pop("gpu")
+    return output_dict
@@ -0,0 +1,90 @@
+#!python3
+
+"""Fleet-wide storage index.
+
+`scan --storage-index` records the RAID topology of every node, the health of
+every storage controller and drive, and the predicted media life left of
+every drive, in a json index. None of these are part of the referenceapi
+schema, so they are not written to the node files. The `storage` command
+answers health queries from that index without contacting any BMC.
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+def load_index(index_path: Path) -> Dict:
+    """Load the index, or start an empty one if it does not exist yet."""
+    if Path(index_path).exists():
+        with open(index_path) as f:
+            return json.load(f)
+    return {"nodes": {}}
+
+
+def update_index(index_path: Path, reference_nodes: Iterable) -> Dict:
+    """Add or replace the scanned nodes in the index at `index_path`."""
+    index = load_index(index_path)
+    for reference_node in reference_nodes:
+        index["nodes"][reference_node.uid] = {
+            "node_name": reference_node.node_name,
+            "storage_controllers": reference_node.storage_controllers,
+            "storage_health": reference_node.storage_health,
+        }
+
+    with open(index_path, "w+") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        print(f"generated {index_path}")
+    return index
+
+
+def is_healthy(health: Optional[str]) -> bool:
+    # BMCs that do not report health are not flagged
+    return health is None or str(health).lower() == "ok"
+
+
+def query_index(
+    index: Mapping,
+    unhealthy: bool = False,
+    media_life_below: Optional[int] = None,
+) -> List[Tuple[str, Mapping]]:
+    """Return sorted (uid, status) rows matching the filters.
+
+    `media_life_below` only matches drives that report a media life.
+    """
+    rows = []
+    for uid, node in index["nodes"].items():
+        for status in node["storage_health"]:
+            if unhealthy and is_healthy(status.get("health")):
+                continue
+            if media_life_below is not None:
+                media_life = status.get("predicted_media_life_left_percent")
+                if media_life is None or not media_life < media_life_below:
+                    continue
+            rows.append((uid, status))
+
+    return sorted(
+        rows,
+        key=lambda row: (index["nodes"][row[0]].get("node_name") or "", row[0]),
+    )
+
+
+def run(args: argparse.Namespace) -> int:
+    # an empty result must mean "no match", not "no index"
+    if not Path(args.index).is_file():
+        raise SystemExit(f"no storage index at {args.index}")
+    index = load_index(args.index)
+    rows = query_index(
+        index, unhealthy=args.unhealthy, media_life_below=args.media_life_below
+    )
+    for uid, status in rows:
+        node_name = index["nodes"][uid].get("node_name")
+        media_life = status.get("predicted_media_life_left_percent")
+        print(
+            f"{node_name} ({uid}) {status.get('type')} {status.get('device')} "
+            f"health={status.get('health')}"
+            + (f" media_life_left={media_life}%" if media_life is not None else "")
+        )
+
+    return 0
@@ -0,0 +1,256 @@
+#!python3
+
+"""Indexed inventory store.
+
+Node documents are kept in a SQLite database as json, next to indexed columns
+for the fields people usually search by, so lookups such as MAC -> node or
+rack -> nodes do not need to read every node file.
+"""
+
+import argparse
+import json
+import sqlite3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from redfish_inspector.nodefiles import load_node_files
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    uid TEXT PRIMARY KEY,
+    node_name TEXT,
+    node_type TEXT,
+    gpu_model TEXT,
+    gpu_name TEXT,
+    rack TEXT,
+    slot TEXT,
+    serial TEXT,
+    infiniband INTEGER NOT NULL DEFAULT 0,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS macs (
+    mac TEXT PRIMARY KEY,
+    uid TEXT NOT NULL REFERENCES nodes(uid) ON DELETE CASCADE
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS nodes_node_name ON nodes(node_name);
+CREATE INDEX IF NOT EXISTS nodes_node_type ON nodes(node_type);
+CREATE INDEX IF NOT EXISTS nodes_gpu_model ON nodes(gpu_model);
+CREATE INDEX IF NOT EXISTS nodes_gpu_name ON nodes(gpu_name);
+CREATE INDEX IF NOT EXISTS nodes_rack ON nodes(rack);
+CREATE INDEX IF NOT EXISTS nodes_serial ON nodes(serial);
+CREATE INDEX IF NOT EXISTS macs_uid ON macs(uid);
+"""
+
+# query filter -> indexed column
+FILTER_COLUMNS = {
+    "name": "nodes.node_name",
+    "node_type": "nodes.node_type",
+    "gpu_model": "nodes.gpu_model",
+    "gpu_name": "nodes.gpu_name",
+    "rack": "nodes.rack",
+    "serial": "nodes.serial",
+    "infiniband": "nodes.infiniband",
+    "mac": "macs.mac",
+}
+
+
+def connect(db_path: Path, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript(SCHEMA)
+        migrate(conn)
+        conn.executescript(INDEXES)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def migrate(conn: sqlite3.Connection):
+    """Add columns introduced after a database was first created."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(nodes)")]
+    if "gpu_name" not in columns:
+        with conn:
+            conn.execute("ALTER TABLE nodes ADD COLUMN gpu_name TEXT")
+            conn.execute(
+                "UPDATE nodes SET gpu_name = json_extract(doc, '$.gpu.gpu_name')"
+            )
+
+
+def require_db(db_path: Path):
+    """Only `index` and `scan --db` create a database, readers need one."""
+    if not Path(db_path).is_file():
+        raise SystemExit(f"no inventory database at {db_path}")
+
+
+def add_nodes(conn: sqlite3.Connection, nodes: Iterable[Mapping]) -> int:
+    """Insert or replace node documents, returns the number stored."""
+    count = 0
+    with conn:
+        for node in nodes:
+            gpu = node.get("gpu") or {}
+            placement = node.get("placement") or {}
+            chassis = node.get("chassis") or {}
+            uid = node["uid"]
+
+            conn.execute("DELETE FROM nodes WHERE uid = ?", (uid,))
+            conn.execute(
+                "INSERT INTO nodes (uid, node_name, node_type, gpu_model, gpu_name, "
+                "rack, slot, serial, infiniband, doc) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    uid,
+                    node.get("node_name"),
+                    node.get("node_type"),
+                    gpu.get("gpu_model"),
+                    gpu.get("gpu_name"),
+                    placement.get("rack"),
+                    placement.get("node"),
+                    chassis.get("serial"),
+                    int(bool(node.get("infiniband"))),
+                    json.dumps(node, sort_keys=True),
+                ),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO macs (mac, uid) VALUES (?, ?)",
+                [
+                    (adapter["mac"].lower(), uid)
+                    for adapter in node.get("network_adapters", [])
+                    if adapter.get("mac")
+                ],
+            )
+            count += 1
+    return count
+
+
+def find_nodes(
+    conn: sqlite3.Connection, filters: Mapping[str, Optional[str]]
+) -> List[Dict]:
+    """Return node documents matching all given filters.
+
+    Filters are the keys of FILTER_COLUMNS; `None` values are ignored.
+    """
+    clauses = []
+    params = []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key not in FILTER_COLUMNS:
+            raise ValueError(f"unknown filter {key}")
+        if key == "mac":
+            value = value.lower()
+        elif key == "infiniband":
+            value = int(str(value).lower() in ("1", "true", "yes"))
+        clauses.append(f"{FILTER_COLUMNS[key]} = ?")
+        params.append(value)
+
+    # a mac belongs to one node, so joining on it cannot duplicate rows
+    sql = "SELECT nodes.doc FROM nodes"
+    if filters.get("mac") is not None:
+        sql += " JOIN macs ON macs.uid = nodes.uid"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY nodes.node_name"
+    return [json.loads(row[0]) for row in conn.execute(sql, params)]
+
+
+def get_node(conn: sqlite3.Connection, uid: str) -> Optional[Dict]:
+    row = conn.execute("SELECT doc FROM nodes WHERE uid = ?", (uid,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+class InventoryRequestHandler(BaseHTTPRequestHandler):
+    """Read only json API.
+
+    GET /nodes?rack=...&gpu_name=...    matching node documents
+    GET /nodes/<uid>                    a single node document
+    """
+
+    db_path: Path
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        conn = connect(self.db_path, read_only=True)
+        try:
+            if parts == ["nodes"]:
+                filters = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                try:
+                    self.send_json(200, find_nodes(conn, filters))
+                except ValueError as exc:
+                    self.send_json(400, {"error": str(exc)})
+            elif len(parts) == 2 and parts[0] == "nodes":
+                node = get_node(conn, parts[1])
+                if node:
+                    self.send_json(200, node)
+                else:
+                    self.send_json(404, {"error": f"no node {parts[1]}"})
+            else:
+                self.send_json(404, {"error": "not found"})
+        finally:
+            conn.close()
+
+    def send_json(self, status: int, body):
+        encoded = json.dumps(body, sort_keys=True).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+def run_index(args: argparse.Namespace) -> int:
+    conn = connect(args.db)
+    total = 0
+    for input_path in args.input_paths:
+        total += add_nodes(conn, load_node_files(input_path).values())
+    conn.close()
+    print(f"stored {total} nodes in {args.db}")
+    return 0
+
+
+def run_query(args: argparse.Namespace) -> int:
+    require_db(args.db)
+    conn = connect(args.db, read_only=True)
+    filters = {
+        "name": args.name,
+        "node_type": args.node_type,
+        "gpu_model": args.gpu_model,
+        "gpu_name": args.gpu_name,
+        "rack": args.rack,
+        "serial": args.serial,
+        "infiniband": args.infiniband,
+        "mac": args.mac,
+    }
+    nodes = find_nodes(conn, filters)
+    conn.close()
+
+    if args.json:
+        print(json.dumps(nodes, indent=2, sort_keys=True))
+    else:
+        for node in nodes:
+            placement = node.get("placement") or {}
+            print(
+                f"{node.get('node_name')} ({node['uid']}) {node.get('node_type')} "
+                f"rack={placement.get('rack')} slot={placement.get('node')}"
+            )
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    require_db(args.db)
+    handler = type("Handler", (InventoryRequestHandler,), {"db_path": Path(args.db)})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"serving {args.db} on http://{args.host}:{args.port}/nodes")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
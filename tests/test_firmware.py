@@ -0,0 +1,29 @@
+from redfish_inspector.firmware import component_for, version_key
+
+
+def test_component_for():
+    assert component_for("Installed-25227-4.40.00.00__iDRAC.Embedded.1-1") == "BMC"
+    assert component_for("Installed-159-2.13.3__BIOS.Setup.1-1", "BIOS") == "BIOS"
+    assert component_for("Installed-0__RAID.Integrated.1-1", "PERC H740P Mini") == (
+        "RAID"
+    )
+    assert (
+        component_for(
+            "Installed-0-NA__Disk.Bay.0:Enclosure.Internal.0-1:RAID.Integrated.1-1",
+            "Disk 0 in Backplane 1 of Integrated RAID Controller 1",
+        )
+        == "Disk"
+    )
+    assert component_for("NIC.Integrated.1-1-1", "Intel(R) Ethernet 10G X710") == (
+        "NIC"
+    )
+    assert component_for("59-0", "NVIDIA Tesla V100-SXM2-16GB") == "GPU"
+    assert component_for("Installed-0__Something", None) == "Other"
+
+
+def test_version_key():
+    assert not version_key("2.13.3") < version_key("2.9.0")
+    assert version_key("2.9.0") < version_key("2.13.3")
+    assert version_key("4.40.00.00") == (4, 40, 0, 0)
+    assert version_key("51.14.0-3900") == (51, 14, 0, 3900)
+    assert version_key(None) == ()
@@ -0,0 +1,43 @@
+from redfish_inspector.storage import query_index
+
+INDEX = {
+    "nodes": {
+        "u1": {
+            "node_name": "c01",
+            "storage_health": [
+                {"type": "controller", "device": "RAID.1", "health": "ok"},
+                {
+                    "type": "drive",
+                    "device": "Disk.0",
+                    "controller": "RAID.1",
+                    "health": "warning",
+                    "predicted_media_life_left_percent": 12,
+                },
+                {
+                    "type": "drive",
+                    "device": "Disk.1",
+                    "controller": "RAID.1",
+                    "health": "OK",
+                    "predicted_media_life_left_percent": 90,
+                },
+            ],
+        },
+        "u2": {
+            "node_name": "c02",
+            "storage_health": [
+                {"type": "drive", "device": "Disk.0", "health": None},
+            ],
+        },
+    }
+}
+
+
+def test_query_unhealthy():
+    rows = query_index(INDEX, unhealthy=True)
+    assert [(uid, s["device"]) for uid, s in rows] == [("u1", "Disk.0")]
+
+
+def test_query_media_life_below():
+    rows = query_index(INDEX, media_life_below=50)
+    assert [(uid, s["device"]) for uid, s in rows] == [("u1", "Disk.0")]
+    assert len(query_index(INDEX)) == 4
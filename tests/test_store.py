@@ -0,0 +1,74 @@
+import pytest
+
+from redfish_inspector import store
+
+
+def make_node(uid, rack="r1", macs=(), infiniband=False, gpu_name=None):
+    node = {
+        "type": "node",
+        "uid": uid,
+        "node_name": f"node-{uid}",
+        "node_type": "compute_skylake",
+        "placement": {"rack": rack, "node": "1"},
+        "chassis": {"serial": f"S-{uid}"},
+        "network_adapters": [{"mac": mac} for mac in macs],
+    }
+    if infiniband:
+        node["infiniband"] = True
+    if gpu_name:
+        node["gpu"] = {"gpu_model": f"long name [{gpu_name}]", "gpu_name": gpu_name}
+    return node
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = store.connect(tmp_path / "inventory.sqlite")
+    yield conn
+    conn.close()
+
+
+def uids(nodes):
+    return [node["uid"] for node in nodes]
+
+
+def test_mac_lookup_is_case_insensitive(conn):
+    store.add_nodes(conn, [make_node("u1", macs=["AA:BB:CC:00:00:01"])])
+
+    assert uids(store.find_nodes(conn, {"mac": "aa:bb:cc:00:00:01"})) == ["u1"]
+    assert uids(store.find_nodes(conn, {"mac": "AA:bb:CC:00:00:01"})) == ["u1"]
+
+
+def test_reindex_replaces_macs(conn):
+    store.add_nodes(conn, [make_node("u1", macs=["aa:00", "aa:01"])])
+    store.add_nodes(conn, [make_node("u1", macs=["aa:02"])])
+
+    assert store.find_nodes(conn, {"mac": "aa:00"}) == []
+    assert uids(store.find_nodes(conn, {"mac": "aa:02"})) == ["u1"]
+    macs = conn.execute("SELECT mac FROM macs WHERE uid = 'u1'").fetchall()
+    assert macs == [("aa:02",)]
+
+
+def test_rack_and_infiniband_filter(conn):
+    store.add_nodes(
+        conn,
+        [
+            make_node("u1", rack="r1", infiniband=True),
+            make_node("u2", rack="r1"),
+            make_node("u3", rack="r2", infiniband=True),
+        ],
+    )
+
+    nodes = store.find_nodes(conn, {"rack": "r1", "infiniband": True})
+    assert uids(nodes) == ["u1"]
+    assert uids(store.find_nodes(conn, {"rack": "r1"})) == ["u1", "u2"]
+
+
+def test_gpu_name_filter(conn):
+    store.add_nodes(conn, [make_node("u1", gpu_name="MI100"), make_node("u2")])
+
+    assert uids(store.find_nodes(conn, {"gpu_name": "MI100"})) == ["u1"]
+
+
+def test_unknown_filter(conn):
+    with pytest.raises(ValueError):
+        store.find_nodes(conn, {"conn": "x"})